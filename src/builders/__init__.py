@@ -3,6 +3,8 @@
 from .glfw3 import GLFW3Builder
 from .sfml import SFMLBuilder
 from .spdlog import SPDLOGBuilder
+from .session import BuildReport, BuildSession
 
 __all__ = ["BGFXBuilder", "FMTBuilder",
-           "GLFW3Builder", "SFMLBuilder", "SPDLOGBuilder"]
+           "GLFW3Builder", "SFMLBuilder", "SPDLOGBuilder",
+           "BuildReport", "BuildSession"]
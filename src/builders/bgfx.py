@@ -1,86 +1,58 @@
 from pathlib import Path
 
 from . import common as cm
-import os
+from utils.journal import Journal
+from utils.profiles import Profile
 import shlex
 
-from colorama import Fore
-
 
 class BGFXBuilder(cm.Builder):
-    def __init__(self, root_path: Path, deps: dict):
-        super().__init__(root_path, deps, 'bgfx')
+    def __init__(self, root_path: Path, deps: dict,
+                 profile: Profile = None, journal: Journal = None):
+        super().__init__(root_path, deps, 'bgfx', profile, journal)
 
     def prepare(self) -> cm.Result:
         # ==============================================================================================
         # bgfx, bimg, and bx dont utilize build directories (but we need them anyways)
         # and have to be built together in one project
         # ==============================================================================================
-        result = self.copy_include()
-        if result.error != cm.Error.SUCCESS:
-            return result
-
-        result = self.make_build_dir()
-        if result.error != cm.Error.SUCCESS:
-            return result
-
-        return super().prepare()
 
-    def build(self) -> cm.Result:
         # ==============================================================================================
         # Ensure linked dependencies (bimg, bx) also exist
         # ==============================================================================================
         bimg_exists = self.deps['bimg'].exists()
         bx_exists = self.deps['bx'].exists()
 
-        # ==============================================================================================
-        # Copy their include directories into the deps folder
-        # ==============================================================================================
         if (not bimg_exists) or (not bx_exists):
             msg = '[BGFX]: bimg and bx must be present for build'
             return cm.Result(cm.Error.LINKED_DEP_NOT_FOUND, msg)
-        else:
-            include_dir = self.deps['bimg'].include_dir
-            tgt_include_dir = self.deps['bimg'].target_include_dir
-
-            if not tgt_include_dir.exists():
-                tgt_include_dir.mkdir(parents=True)
-
-            cm.Builder.copytree(include_dir, tgt_include_dir)
-            if not tgt_include_dir.exists():
-                msg = f'{Fore.RED}[ERROR]: {Fore.RESET}' \
-                      f'failed to transact copy from \'{str(include_dir)}\' to \'{str(tgt_include_dir)}\''
-                return cm.Result(cm.Error.FILE_COPY_FAILED, msg)
-
-            include_dir = self.deps['bx'].include_dir
-            tgt_include_dir = self.deps['bx'].target_include_dir
-
-            if not tgt_include_dir.exists():
-                tgt_include_dir.mkdir(parents=True)
-
-            cm.Builder.copytree(include_dir, tgt_include_dir)
-            if not tgt_include_dir.exists():
-                msg = f'{Fore.RED}[ERROR]: {Fore.RESET}' \
-                      f'failed to transact copy from \'{str(include_dir)}\' to \'{str(tgt_include_dir)}\''
-                return cm.Result(cm.Error.FILE_COPY_FAILED, msg)
 
         # ==============================================================================================
-        # Save current cwd
+        # Copy the include directories of all three into the deps folder
         # ==============================================================================================
-        old_cwd: str = os.getcwd()
+        result = self.run_phase('copy_include', self.copy_include)
+        if result.error != cm.Error.SUCCESS:
+            return result
+
+        result = self.run_phase('make_build_dir', self.make_build_dir)
+        if result.error != cm.Error.SUCCESS:
+            return result
+
+        return super().prepare()
 
+    def build(self) -> cm.Result:
         # ==============================================================================================
-        # Change cwd to build bgfx
+        # bgfx is built from its source directory
         # ==============================================================================================
         cwd: Path = self.deps[self.name].include_dir.parent
-        os.chdir(str(cwd))
 
         # ==============================================================================================
         # Run genie
         # TODO: change platform and genie generation based on OS
         # ==============================================================================================
-        cmd = shlex.split('../bx/tools/bin/windows/genie vs2019')
-        result = self.run_and_capture(cmd)
+        genie: Path = self.deps['bx'].include_dir.parent / 'tools' / 'bin' / 'windows' / 'genie'
+        cmd = [str(genie), 'vs2019']
+        result = self.run_phase('configure', lambda: self.run_and_capture(cmd, cwd))
         if result.error != cm.Error.SUCCESS:
             return result
 
@@ -90,7 +62,7 @@ def build(self) -> cm.Result:
         # ==============================================================================================
         cmd = shlex.split(
             'msbuild .build/projects/vs2019/bgfx.sln /clp:ErrorsOnly /p:Configuration="Release" /p:Platform="x64"')
-        result = self.run_and_capture(cmd)
+        result = self.run_phase('compile', lambda: self.run_and_capture(cmd, cwd))
         if result.error != cm.Error.SUCCESS:
             return result
 
@@ -105,20 +77,34 @@ def build(self) -> cm.Result:
         bx_lib_path: Path = lib_path / 'bxRelease.lib'
         lib_paths = [bgfx_lib_path, bimg_lib_path, bx_lib_path]
 
-        result = self.copy_libs(lib_paths)
+        result = self.run_phase('copy_libs', lambda: self.copy_libs(lib_paths))
         if result.error != cm.Error.SUCCESS:
             return result
 
         # ==============================================================================================
-        # Clean-up, restore old cwd
+        # Clean-up
         # ==============================================================================================
-        os.chdir(old_cwd)
-
-        result = self.clean_build_dir(lib_paths)
+        result = self.run_phase('clean_build_dir', lambda: self.clean_build_dir(lib_paths))
         if result.error != cm.Error.SUCCESS:
             return result
 
         return super().build()
 
+    def copy_include(self) -> cm.Result:
+        # ==============================================================================================
+        # Copies the include directories of bgfx, bimg and bx in one go,
+        # so file copies overlap across all three trees
+        # ==============================================================================================
+        trees = [(self.deps[name].include_dir, self.deps[name].target_include_dir)
+                 for name in ['bgfx', 'bimg', 'bx']]
+
+        return cm.Builder.copytrees(trees)
+
+    def configure_args(self) -> list[str]:
+        # ==============================================================================================
+        # genie does not take CMake cache options, so nothing from the profile is applied
+        # ==============================================================================================
+        return []
+
     def clean(self) -> cm.Result:
         return super().clean()
@@ -1,13 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum, auto
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
+import functools
+import hashlib
+import json
 import os
 import shutil
 import subprocess as sp
 
 from colorama import Fore
 
+from utils.journal import Journal
+from utils.profiles import Profile, get_profile
+
+
+# Number of files copied in parallel
+COPY_WORKERS: int = 16
+
 
 class Error(Enum):
     SUCCESS = 1
@@ -19,6 +30,8 @@ class Error(Enum):
     FILE_COPY_FAILED = auto()
     FILE_EXISTS_WARNING = auto()
     ARGUMENT_MISSING = auto()
+    NOT_RUN = auto()
+    INTERNAL_ERROR = auto()
 
 
 @dataclass
@@ -27,28 +40,122 @@ class Result(object):
     result: Any = None
 
 
+@functools.lru_cache(maxsize=None)
+def get_copy_pool() -> ThreadPoolExecutor:
+    # ==============================================================================================
+    # Bounded pool for file copies, shared by all builders so concurrent
+    # dependencies do not multiply the number of in-flight copies
+    # ==============================================================================================
+    return ThreadPoolExecutor(max_workers=COPY_WORKERS, thread_name_prefix='copy')
+
+
 class Builder():
 
     @staticmethod
-    def copytree(src, dst, ignore=None):
+    def copytrees(trees: list[tuple[Path, Path]], ignore=None) -> Result:
         # ==============================================================================================
-        # Alternative to `shutil.copytree`
+        # Alternative to `shutil.copytree` for several trees at once
         # Overwrites files if they already exist (instead or throwing an exception)
+        #
+        # All trees are walked once up front, then directories are created and files are copied
+        # on the shared copy pool, so per-file latency overlaps across files and trees
+        # ==============================================================================================
+        dirs: list[str] = []
+        files: list[tuple[str, str]] = []
+        walk_errors: list[str] = []
+        for src, dst in trees:
+            src, dst = str(src), str(dst)
+            if os.path.isfile(src):
+                files.append((src, dst))
+                continue
+
+            if not os.path.isdir(src):
+                msg = f'{Fore.RED}[ERROR]: {Fore.RESET}' \
+                    f'failed to transact copy, \'{src}\' does not exist'
+                return Result(Error.FILE_MISSING, msg)
+
+            # Symlinked directories are followed, like regular ones
+            # Real paths of each directory's ancestors guard against symlink loops
+            chains: dict[str, tuple[str]] = {src: (os.path.realpath(src),)}
+            for dirpath, dirnames, filenames in os.walk(src, followlinks=True,
+                                                        onerror=lambda e: walk_errors.append(str(e))):
+                chain = chains.pop(dirpath)
+                if ignore is not None:
+                    ignored = ignore(dirpath, dirnames + filenames)
+                    dirnames[:] = [d for d in dirnames if d not in ignored]
+                    filenames = [f for f in filenames if f not in ignored]
+
+                for d in dirnames:
+                    sub_dirpath = os.path.join(dirpath, d)
+                    real_path = os.path.realpath(sub_dirpath)
+                    if real_path in chain:
+                        msg = f'{Fore.RED}[ERROR]: {Fore.RESET}' \
+                            f'failed to transact copy, symlink loop at \'{sub_dirpath}\''
+                        return Result(Error.FILE_COPY_FAILED, msg)
+
+                    chains[sub_dirpath] = chain + (real_path,)
+
+                tgt_dirpath = os.path.join(dst, os.path.relpath(dirpath, src))
+                dirs.append(tgt_dirpath)
+                for f in filenames:
+                    files.append((os.path.join(dirpath, f), os.path.join(tgt_dirpath, f)))
+
+        # Directories that could not be listed would otherwise be skipped silently
+        if walk_errors:
+            msg = f'{Fore.RED}[ERROR]: {Fore.RESET}' \
+                f'failed to transact copy ({len(walk_errors)} errors):\n' + '\n'.join(walk_errors[:10])
+            return Result(Error.FILE_COPY_FAILED, msg)
+
+        pool = get_copy_pool()
+        # Directories first, the file copies depend on them
+        for tasks in ([functools.partial(os.makedirs, d, exist_ok=True) for d in dirs],
+                      [functools.partial(shutil.copyfile, src, dst) for src, dst in files]):
+            futures = [pool.submit(task) for task in tasks]
+
+            errors = []
+            for future in futures:
+                try:
+                    future.result()
+                except OSError as e:
+                    errors.append(str(e))
+
+            if errors:
+                msg = f'{Fore.RED}[ERROR]: {Fore.RESET}' \
+                    f'failed to transact copy ({len(errors)} errors):\n' + '\n'.join(errors[:10])
+                return Result(Error.FILE_COPY_FAILED, msg)
+
+        return Result(Error.SUCCESS, None)
+
+    @staticmethod
+    def copytree(src, dst, ignore=None) -> Result:
+        return Builder.copytrees([(src, dst)], ignore)
+
+    def run_phase(self, phase: str, fn: Callable[[], Result]) -> Result:
+        # ==============================================================================================
+        # Runs a single build phase and checkpoints its outcome in the journal
+        # Phases already completed in a resumed run are skipped
         # ==============================================================================================
-        if os.path.isdir(src):
-            if not os.path.isdir(dst):
-                os.makedirs(dst)
-            files = os.listdir(src)
-            if ignore is not None:
-                ignored = ignore(src, files)
-            else:
-                ignored = set()
-            for f in files:
-                if f not in ignored:
-                    Builder.copytree(os.path.join(src, f),
-                                     os.path.join(dst, f), ignore)
+        if self.journal.is_done(self.key, phase):
+            self.skipped_phases.append(phase)
+            return Result(Error.SUCCESS, None)
+
+        try:
+            result = fn()
+        except OSError as e:
+            msg = f'{Fore.RED}[ERROR]: {Fore.RESET}' \
+                f'phase \'{phase}\' failed: {e}'
+            result = Result(Error.IO_ERROR, msg)
+        except Exception:
+            # Still record where it broke, the caller decides what to do with the exception
+            self.journal.fail(self.key, phase)
+            raise
+
+        if result.error == Error.SUCCESS:
+            self.journal.complete(self.key, phase)
         else:
-            shutil.copyfile(src, dst)
+            self.journal.fail(self.key, phase)
+
+        return result
 
     def copy_include(self) -> Result:
         # ==============================================================================================
@@ -58,14 +165,11 @@ def copy_include(self) -> Result:
         include_dir = str(self.include_dir)
         tgt_include_dir = str(self.target_include_dir)
 
-        if not self.target_include_dir.exists():
-            self.target_include_dir.mkdir(parents=True)
-
-        Builder.copytree(self.include_dir, self.target_include_dir)
-        if not self.target_include_dir.exists():
+        result = Builder.copytree(self.include_dir, self.target_include_dir)
+        if result.error != Error.SUCCESS:
             msg = f'{Fore.RED}[ERROR]: {Fore.RESET}' \
-                f'failed to transact copy from \'{include_dir}\' to \'{tgt_include_dir}\''
-            return Result(Error.FILE_COPY_FAILED, msg)
+                f'failed to transact copy from \'{include_dir}\' to \'{tgt_include_dir}\'\n'
+            return Result(result.error, msg + result.result)
 
         return Result(Error.SUCCESS, None)
 
@@ -92,13 +196,37 @@ def make_build_dir(self) -> Result:
                 f'failed to create directory \'{tgt_build_dir}\''
             return Result(Error.FILE_MISSING, msg)
 
+        return self.invalidate_cmake_cache()
+
+    def invalidate_cmake_cache(self) -> Result:
+        # ==============================================================================================
+        # `CMAKE_<LANG>_FLAGS_INIT` is only read when the cache is first created,
+        # so a cache left behind by a build with other options must be thrown away
+        # ==============================================================================================
+        digest_path: Path = self.build_dir / 'configure.digest'
+        cache_path: Path = self.build_dir / 'CMakeCache.txt'
+
+        try:
+            if digest_path.exists() and digest_path.read_text() == self.digest():
+                return Result(Error.SUCCESS, None)
+
+            if cache_path.exists():
+                cache_path.unlink()
+
+            digest_path.write_text(self.digest())
+        except OSError as e:
+            msg = f'{Fore.RED}[ERROR]: {Fore.RESET}' \
+                f'failed to invalidate CMake cache in \'{str(self.build_dir)}\': {e}'
+            return Result(Error.IO_ERROR, msg)
+
         return Result(Error.SUCCESS, None)
 
-    def run_and_capture(self, cmd: list[str]) -> Result:
+    def run_and_capture(self, cmd: list[str], cwd: Path = None) -> Result:
         # ==============================================================================================
         # Runs a command and captures `stdout` and `stderr`
+        # The command runs in `cwd`, our own cwd is never changed (builders may run in parallel)
         # ==============================================================================================
-        result: sp.CompletedProcess = sp.run(cmd)
+        result: sp.CompletedProcess = sp.run(cmd, cwd=cwd)
         if result.returncode != 0:
             msg = f'{Fore.RED}[ERROR]: {Fore.RESET}' \
                 'build command failed'
@@ -146,10 +274,61 @@ def clean_build_dir(self, ignore: list[Path] = None) -> Result:
 
         return Result(Error.SUCCESS, None)
 
-    def __init__(self, root_path: Path, deps: dict, name: str):
+    def configure_args(self) -> list[str]:
+        # ==============================================================================================
+        # Extra arguments for the configure step, as selected by the build profile
+        # ==============================================================================================
+        return self.profile.configure_args()
+
+    def digest(self) -> str:
+        # ==============================================================================================
+        # Digest of the options this builder actually applies, unused profile options don't count
+        # ==============================================================================================
+        data = json.dumps(self.configure_args())
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def write_fingerprint(self) -> Result:
+        # ==============================================================================================
+        # Records the profile the dependency was built with next to its artifacts
+        # ==============================================================================================
+        fingerprint_path: Path = self.target_build_dir.parent / 'fingerprint.json'
+        data = {
+            'name': self.name,
+            'profile': self.profile.name,
+            'configure_args': self.configure_args(),
+            'digest': self.digest(),
+        }
+
+        try:
+            fingerprint_path.write_text(json.dumps(data, indent=4))
+        except OSError as e:
+            msg = f'{Fore.RED}[ERROR]: {Fore.RESET}' \
+                f'failed to write fingerprint \'{str(fingerprint_path)}\': {e}'
+            return Result(Error.IO_ERROR, msg)
+
+        return Result(Error.SUCCESS, None)
+
+    def artifact_size(self) -> int:
+        # ==============================================================================================
+        # Total size in bytes of the built libraries, headers are not counted
+        # ==============================================================================================
+        size = 0
+        if not self.target_build_dir.exists():
+            return size
+
+        for path in self.target_build_dir.rglob('*'):
+            if path.is_file():
+                size += path.stat().st_size
+
+        return size
+
+    def __init__(self, root_path: Path, deps: dict, name: str,
+                 profile: Profile = None, journal: Journal = None):
         self.root_path: Path = root_path
         self.deps: dict = deps
         self.name: str = name
+        self.profile: Profile = profile if profile is not None else get_profile('default', name)
+        self.journal: Journal = journal if journal is not None else Journal()
 
         self.build_dir: Path = self.root_path / 'build' / self.name
         self.include_dir: Path = self.root_path / 'vendor' / self.name / 'include'
@@ -157,11 +336,17 @@ def __init__(self, root_path: Path, deps: dict, name: str):
         self.target_build_dir: Path = self.root_path / 'deps' / self.name / 'bin'
         self.target_include_dir: Path = self.root_path / 'deps' / self.name / 'include'
 
+        # Identifies this build in the journal, unique across project roots
+        self.key: str = str(self.build_dir)
+
+        # Phases skipped by `run_phase`, because a resumed run already completed them
+        self.skipped_phases: list[str] = []
+
     def prepare(self) -> Result:
         return Result(Error.SUCCESS, None)
 
     def build(self) -> Result:
-        return Result(Error.SUCCESS, None)
+        return self.write_fingerprint()
 
     def clean(self) -> Result:
         return Result(Error.SUCCESS, None)
@@ -1,13 +1,15 @@
 from pathlib import Path
 
 from . import common as cm
-import os
+from utils.journal import Journal
+from utils.profiles import Profile
 import shlex
 
 
 class FMTBuilder(cm.Builder):
-    def __init__(self, root_path: Path, deps: dict):
-        super().__init__(root_path, deps, 'fmt')
+    def __init__(self, root_path: Path, deps: dict,
+                 profile: Profile = None, journal: Journal = None):
+        super().__init__(root_path, deps, 'fmt', profile, journal)
 
     def prepare(self) -> cm.Result:
         # ==============================================================================================
@@ -19,37 +21,27 @@ def prepare(self) -> cm.Result:
         # ==============================================================================================
         # Create include directory and copy headers
         # ==============================================================================================
-        result = self.copy_include()
+        result = self.run_phase('copy_include', self.copy_include)
         if result.error != cm.Error.SUCCESS:
             return result
 
         # ==============================================================================================
         # Create build directory
         # ==============================================================================================
-        result = self.make_build_dir()
+        result = self.run_phase('make_build_dir', self.make_build_dir)
         if result.error != cm.Error.SUCCESS:
             return result
 
         return super().prepare()
 
     def build(self) -> cm.Result:
-        # ==============================================================================================
-        # Save current cwd
-        # ==============================================================================================
-        old_cwd: str = os.getcwd()
-
-        # ==============================================================================================
-        # Build fmt in target build directory
-        # ==============================================================================================
-        cwd: Path = self.build_dir
-        os.chdir(str(cwd))
-
         # ==============================================================================================
         # Run cmake
         # ==============================================================================================
         cmd = shlex.split(f'cmake ../../vendor/{self.name}')
+        cmd += self.configure_args()
 
-        result = self.run_and_capture(cmd)
+        result = self.run_phase('configure', lambda: self.run_and_capture(cmd, self.build_dir))
         if result.error != cm.Error.SUCCESS:
             return result
 
@@ -60,7 +52,7 @@ def build(self) -> cm.Result:
         cmd = shlex.split(
             'msbuild FMT.sln /t:fmt /clp:ErrorsOnly /p:Configuration="Release" /p:Platform="x64"')
 
-        result = self.run_and_capture(cmd)
+        result = self.run_phase('compile', lambda: self.run_and_capture(cmd, self.build_dir))
         if result.error != cm.Error.SUCCESS:
             return result
 
@@ -69,17 +61,15 @@ def build(self) -> cm.Result:
         # ==============================================================================================
         lib_path: Path = self.build_dir / 'Release' / 'fmt.lib'
 
-        result = self.copy_libs([lib_path])
+        result = self.run_phase('copy_libs', lambda: self.copy_libs([lib_path]))
         if result.error != cm.Error.SUCCESS:
             return result
 
         # ==============================================================================================
-        # Clean-up, restore old cwd
-        # and remove all other directories and files associated with the build
+        # Clean-up
+        # remove all other directories and files associated with the build
         # ==============================================================================================
-        os.chdir(old_cwd)
-
-        result = self.clean_build_dir([lib_path])
+        result = self.run_phase('clean_build_dir', lambda: self.clean_build_dir([lib_path]))
         if result.error != cm.Error.SUCCESS:
             return result
 
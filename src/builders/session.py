@@ -0,0 +1,238 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+import functools
+import importlib
+import re
+import threading
+import time
+
+from . import common as cm
+from utils.journal import Journal
+from utils.profiles import get_profile
+from utils.types import Dependency
+
+
+# ==================================================================================================
+# Dependencies that are built together with another one, and must be resolved alongside it
+# ==================================================================================================
+LINKED_DEPS: dict[str, list[str]] = {
+    'bgfx': ['bimg', 'bx'],
+}
+
+
+@dataclass
+class BuildReport(object):
+    name: str
+    root_path: Path
+    profile: str
+
+    elapsed: float = 0.0
+    size: int = 0
+
+    # Phase the build failed in and the builder's error message, if it failed
+    # `failed_phase` is 'internal' when an unexpected exception was raised outside any phase
+    failed_phase: str = None
+    message: str = None
+
+    # Phases that were not run again, because a resumed run already completed them
+    skipped_phases: list[str] = field(default_factory=list)
+
+    # Root the artifacts were copied from, when an identical build was shared
+    shared_from: Path = None
+
+
+# Terminal color codes and the leading severity tag, builders embed both in their messages
+_COLOR_CODES = re.compile(r'\x1b\[[0-9;]*m')
+_SEVERITY_TAG = re.compile(r'^\[(ERROR|WARNING|INFO)\]: ')
+
+
+def plain_message(text: str) -> str:
+    if text is None:
+        return None
+
+    return _SEVERITY_TAG.sub('', _COLOR_CODES.sub('', str(text)))
+
+
+def resolve_deps(names: list[str], root_path: Path) -> dict[str, Dependency]:
+    # ==============================================================================================
+    # Acquire a dictionary, with paths pointing to each dependency
+    # ==============================================================================================
+    deps = {}
+    for name in names:
+        for linked in LINKED_DEPS.get(name, []):
+            deps[linked] = Dependency.create(linked, root_path)
+
+        deps[name] = Dependency.create(name, root_path)
+
+    return deps
+
+
+@functools.lru_cache(maxsize=None)
+def get_builder_class(name: str) -> type:
+    try:
+        module = importlib.import_module(f'builders.{name}')
+        return getattr(module, f'{name.upper()}Builder')
+    except (ImportError, AttributeError):
+        raise ValueError(f'unknown dependency \'{name}\', no builder found') from None
+
+
+class BuildSession(object):
+    # ==============================================================================================
+    # Builds or cleans the same dependencies for many project roots in one process
+    #
+    # All builds share one worker pool and one journal. Builds that would produce
+    # the same artifacts (same vendor sources and applied options) run once, and their
+    # outputs are copied to the other roots
+    #
+    # The journal is also the cache of finished builds: with `resume`, every phase already
+    # completed with the same applied options is skipped, whether it completed in an earlier
+    # `build()` of this session or in another session sharing `state_path`.
+    # Changed vendor sources are not detected, so without `resume` everything is rebuilt
+    # ==============================================================================================
+
+    def __init__(self, roots: list, deps: list[str], jobs: int = 1, profile: str = 'default',
+                 keep_going: bool = False, resume: bool = False, state_path: Path = None):
+        self.roots: list[Path] = [Path(root).resolve() for root in roots]
+        self.names: list[str] = list(deps)
+        self.jobs: int = max(1, jobs)
+        self.profile: str = profile
+        self.keep_going: bool = keep_going
+        self.resume: bool = resume
+
+        # Fail early on typos, before anything is built for any root
+        for name in self.names:
+            get_builder_class(name)
+            get_profile(self.profile, name)
+
+        # Without a state path, checkpoints only live as long as the session
+        self.journal: Journal = Journal(state_path)
+
+    def resolve(self) -> dict[Path, dict[str, Dependency]]:
+        return {root: resolve_deps(self.names, root) for root in self.roots}
+
+    def build_key(self, name: str, root_path: Path) -> tuple:
+        # ==============================================================================================
+        # Builds with equal keys produce the same artifacts
+        # ==============================================================================================
+        sources = [str((root_path / 'vendor' / dep).resolve())
+                   for dep in LINKED_DEPS.get(name, []) + [name]]
+        builder = self._create_builder(name, root_path, resolve_deps([name], root_path))
+
+        return (name, tuple(sources), builder.digest())
+
+    def build(self) -> dict[Path, dict[str, cm.Result]]:
+        # ==============================================================================================
+        # Builds every dependency for every root
+        # Every root gets a `Result` carrying a `BuildReport` for every dependency. Without
+        # `keep_going`, builds that had not started before the first failure are `NOT_RUN`
+        # ==============================================================================================
+        resolved = self.resolve()
+
+        # Group roots by build key, the first root of each group does the actual build
+        groups: dict[tuple, list[Path]] = {}
+        for root in self.roots:
+            for name in self.names:
+                groups.setdefault(self.build_key(name, root), []).append(root)
+
+        # A fresh run drops every checkpoint up front, so builds that end up `NOT_RUN`
+        # can't be skipped by a later resume on the strength of an older run
+        if not self.resume:
+            for root, deps in resolved.items():
+                for name in self.names:
+                    self.journal.reset(self._create_builder(name, root, deps).key)
+
+        stop = threading.Event()
+        results: dict[Path, dict[str, cm.Result]] = {root: {} for root in self.roots}
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            futures = {}
+            for key, roots in groups.items():
+                future = pool.submit(self._build_one, key[0], roots[0], resolved[roots[0]], stop)
+                futures[future] = (key, roots)
+
+            for future in as_completed(futures):
+                key, roots = futures[future]
+                result = future.result()
+                results[roots[0]][key[0]] = result
+
+                for root in roots[1:]:
+                    results[root][key[0]] = self._share(result, key[0], root)
+
+        return results
+
+    def clean(self) -> dict[Path, dict[str, cm.Result]]:
+        results: dict[Path, dict[str, cm.Result]] = {}
+        for root, deps in self.resolve().items():
+            results[root] = {}
+            for name in self.names:
+                builder = self._create_builder(name, root, deps)
+                self.journal.reset(builder.key)
+                results[root][name] = builder.clean()
+
+        return results
+
+    def _create_builder(self, name: str, root_path: Path, deps: dict) -> cm.Builder:
+        profile = get_profile(self.profile, name)
+        return get_builder_class(name)(root_path, deps, profile, self.journal)
+
+    def _build_one(self, name: str, root_path: Path, deps: dict,
+                   stop: threading.Event) -> cm.Result:
+        report = BuildReport(name, root_path, self.profile)
+        if stop.is_set():
+            report.message = 'not run, an earlier build failed'
+            return cm.Result(cm.Error.NOT_RUN, report)
+
+        start = time.perf_counter()
+        builder = None
+        try:
+            builder = self._create_builder(name, root_path, deps)
+            self.journal.begin(builder.key, builder.digest(), self.resume)
+
+            result = builder.run_phase('prepare', builder.prepare)
+            if result.error == cm.Error.SUCCESS:
+                result = builder.run_phase('build', builder.build)
+
+            if result.error == cm.Error.SUCCESS:
+                report.size = builder.artifact_size()
+            else:
+                report.failed_phase = self.journal.failed_phase(builder.key)
+                report.message = plain_message(result.result)
+        except Exception as e:
+            # One broken build must not take down the results of every other root
+            result = cm.Result(cm.Error.INTERNAL_ERROR, None)
+            phase = self.journal.failed_phase(builder.key) if builder is not None else None
+            report.failed_phase = phase if phase is not None else 'internal'
+            report.message = f'unexpected {type(e).__name__}: {e}'
+
+        if builder is not None:
+            report.skipped_phases = list(builder.skipped_phases)
+
+        report.elapsed = time.perf_counter() - start
+        if result.error != cm.Error.SUCCESS and not self.keep_going:
+            stop.set()
+
+        return cm.Result(result.error, report)
+
+    def _share(self, result: cm.Result, name: str, root_path: Path) -> cm.Result:
+        # ==============================================================================================
+        # Copies the artifacts of a finished build into another root
+        # A failed or skipped build is reported for this root as well
+        # ==============================================================================================
+        source: BuildReport = result.result
+        report = BuildReport(name, root_path, source.profile, source.elapsed, source.size,
+                             source.failed_phase, source.message, list(source.skipped_phases),
+                             shared_from=source.root_path)
+        if result.error != cm.Error.SUCCESS:
+            return cm.Result(result.error, report)
+
+        trees = [(source.root_path / 'deps' / dep, root_path / 'deps' / dep)
+                 for dep in LINKED_DEPS.get(name, []) + [name]
+                 if (source.root_path / 'deps' / dep).exists()]
+
+        result = cm.Builder.copytrees(trees)
+        if result.error != cm.Error.SUCCESS:
+            report.failed_phase = 'share'
+            report.message = plain_message(result.result)
+            return cm.Result(result.error, report)
+
+        return cm.Result(cm.Error.SUCCESS, report)
@@ -1,13 +1,15 @@
 from pathlib import Path
 
 from . import common as cm
-import os
+from utils.journal import Journal
+from utils.profiles import Profile
 import shlex
 
 
 class SFMLBuilder(cm.Builder):
-    def __init__(self, root_path: Path, deps: dict):
-        super().__init__(root_path, deps, 'sfml')
+    def __init__(self, root_path: Path, deps: dict,
+                 profile: Profile = None, journal: Journal = None):
+        super().__init__(root_path, deps, 'sfml', profile, journal)
 
     def prepare(self) -> cm.Result:
         # ==============================================================================================
@@ -17,38 +19,28 @@ def prepare(self) -> cm.Result:
         # ==============================================================================================
         # Create include directory and copy headers
         # ==============================================================================================
-        result = self.copy_include()
+        result = self.run_phase('copy_include', self.copy_include)
         if result.error != cm.Error.SUCCESS:
             return result
 
         # ==============================================================================================
         # Create build directory
         # ==============================================================================================
-        result = self.make_build_dir()
+        result = self.run_phase('make_build_dir', self.make_build_dir)
         if result.error != cm.Error.SUCCESS:
             return result
 
         return super().prepare()
 
     def build(self) -> cm.Result:
-        # ==============================================================================================
-        # Save current cwd
-        # ==============================================================================================
-        old_cwd: str = os.getcwd()
-
-        # ==============================================================================================
-        # Build SFML in target build directory
-        # ==============================================================================================
-        cwd: Path = self.build_dir
-        os.chdir(str(cwd))
-
         # ==============================================================================================
         # Run cmake to generate build configurations
         # ==============================================================================================
         cmd = shlex.split(
             f'cmake ../../vendor/{self.name} -DCMAKE_BUILD_TYPE=Release')
+        cmd += self.configure_args()
 
-        result = self.run_and_capture(cmd)
+        result = self.run_phase('configure', lambda: self.run_and_capture(cmd, self.build_dir))
         if result.error != cm.Error.SUCCESS:
             return result
 
@@ -59,7 +51,7 @@ def build(self) -> cm.Result:
         cmd = ['msbuild', 'SFML.sln', '/clp:ErrorsOnly',
                '/t:CMake\\ALL_BUILD', '/p:Configuration=Release', '/p:Platform=x64']
 
-        result = self.run_and_capture(cmd)
+        result = self.run_phase('compile', lambda: self.run_and_capture(cmd, self.build_dir))
         if result.error != cm.Error.SUCCESS:
             return result
 
@@ -77,17 +69,7 @@ def build(self) -> cm.Result:
         lib_paths = [sfml_audio_lib, sfml_graphics_lib, sfml_main_lib,
                      sfml_network_lib, sfml_system_lib, sfml_window_lib]
 
-        result = self.copy_libs(lib_paths)
-        if result.error != cm.Error.SUCCESS:
-            return result
-
-        # ==============================================================================================
-        # Clean-up, restore old cwd
-        # and remove all other directories and files associated with the build
-        # ==============================================================================================
-        os.chdir(old_cwd)
-
-        result = self.copy_libs(lib_paths)
+        result = self.run_phase('copy_libs', lambda: self.copy_libs(lib_paths))
         if result.error != cm.Error.SUCCESS:
             return result
 
@@ -1,11 +1,14 @@
 from pathlib import Path
 
 from . import common as cm
+from utils.journal import Journal
+from utils.profiles import Profile
 
 
 class SPDLOGBuilder(cm.Builder):
-    def __init__(self, root_path: Path, deps: dict):
-        super().__init__(root_path, deps, 'spdlog')
+    def __init__(self, root_path: Path, deps: dict,
+                 profile: Profile = None, journal: Journal = None):
+        super().__init__(root_path, deps, 'spdlog', profile, journal)
 
     def prepare(self) -> cm.Result:
         # ==============================================================================================
@@ -15,7 +18,7 @@ def prepare(self) -> cm.Result:
         # ==============================================================================================
         # Create include directory and copy headers
         # ==============================================================================================
-        result = self.copy_include()
+        result = self.run_phase('copy_include', self.copy_include)
         if result.error != cm.Error.SUCCESS:
             return result
 
@@ -24,5 +27,11 @@ def prepare(self) -> cm.Result:
     def build(self) -> cm.Result:
         return super().build()
 
+    def configure_args(self) -> list[str]:
+        # ==============================================================================================
+        # spdlog is never configured, so nothing from the profile is applied
+        # ==============================================================================================
+        return []
+
     def clean(self) -> cm.Result:
         return super().clean()
@@ -1,4 +1,4 @@
-from utils.types import Dependency
+from utils.profiles import PROFILES
 
 from builders.common import Error, Result
 from builders import *
@@ -6,7 +6,6 @@
 from classopt import classopt, config
 import colorama
 
-import importlib
 from pathlib import Path
 import sys
 
@@ -18,48 +17,58 @@ class Opt:
     action: str       # Action to perform
     root_path: str    # Path to project root
     deps: list[str]   # Dependencies
+    profile: str = config(default='default', choices=list(PROFILES.keys()))  # Build profile
+    keep_going: bool = False  # Continue with other dependencies after a failure
+    resume: bool = False      # Skip phases completed by a previous run
+    jobs: int = 1             # Number of dependencies built in parallel
 
 
-# Acquire a dictionary, with paths pointing to each dependency
-def get_all_deps(opts: Opt) -> dict:
-    root_tmp = Path(opts.root_path)
-
-    root = root_tmp.resolve()
-    deps = {}
-    for dep in opts.deps:
-        if dep == 'bgfx':
-            # add bimg and bgfx
-            deps['bimg'] = Dependency.create('bimg', root)
-            deps['bx'] = Dependency.create('bx', root)
-            deps[dep] = Dependency.create(dep, root)
-        else:
-            deps[dep] = Dependency.create(dep, root)
-
-    return deps
-
-
-def add_builder(name: str, opt: Opt, deps: dict, root_path: Path):
-    if name in opt.deps:
-        module = importlib.import_module(f'builders.{name}')
-        builder = getattr(module, f'{name.upper()}Builder')(root_path, deps)
-        if opt.action == 'build':
-            result = builder.prepare()
-            if result.error != Error.SUCCESS:
-                print(result.result)
-                raise RuntimeError(
-                    f'[{name.upper()}]: failed to prepare build')
-
-            result = builder.build()
-            if result.error != Error.SUCCESS:
-                print(result.result)
-                raise RuntimeError(
-                    f'[{name.upper()}]: failed to execute build')
-        elif opt.action == 'clean':
-            result = builder.clean()
-            if result.error != Error.SUCCESS:
-                print(result.result)
-                raise RuntimeError(
-                    f'[{name.upper()}]: failed to execute clean')
+# Human-readable size of the built artifacts
+def format_size(size: int) -> str:
+    for unit in ['B', 'KiB', 'MiB']:
+        if size < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+
+    return f'{size:.1f} GiB'
+
+
+def report_build(name: str, result: Result) -> bool:
+    report: BuildReport = result.result
+    if result.error == Error.NOT_RUN:
+        print(f'{colorama.Fore.YELLOW}[WARNING]: {colorama.Fore.RESET}\'{name}\' {report.message}')
+        return False
+
+    for phase in report.skipped_phases:
+        print(f'{colorama.Fore.GREEN}[INFO]: {colorama.Fore.RESET}'
+              f'skipped phase \'{phase}\' for \'{name}\' (already completed)')
+
+    if result.error != Error.SUCCESS:
+        phase = f' in phase \'{report.failed_phase}\'' if report.failed_phase is not None else ''
+        print(f'{colorama.Fore.RED}[ERROR]: {colorama.Fore.RESET}{report.message}')
+        print(
+            f'{colorama.Fore.RED}RuntimeError caught: {colorama.Style.BRIGHT}{colorama.Fore.BLUE}'
+            f'[{name.upper()}]: failed to execute build{phase}'
+            f'{colorama.Style.RESET_ALL}\n', file=sys.stderr)
+        return False
+
+    print(
+        f'{colorama.Fore.GREEN}[INFO]: {colorama.Fore.RESET}\'{name}\' built with profile '
+        f'\'{report.profile}\' in {report.elapsed:.1f}s ({format_size(report.size)})')
+    print(
+        f'{colorama.Fore.GREEN}[INFO]: {colorama.Fore.RESET}build succesful for \'{name}\'')
+    return True
+
+
+def report_clean(name: str, result: Result) -> bool:
+    if result.error != Error.SUCCESS:
+        print(result.result)
+        print(
+            f'{colorama.Fore.RED}RuntimeError caught: {colorama.Style.BRIGHT}{colorama.Fore.BLUE}'
+            f'[{name.upper()}]: failed to execute clean{colorama.Style.RESET_ALL}\n', file=sys.stderr)
+        return False
+
+    return True
 
 
 def main():
@@ -69,22 +78,38 @@ def main():
     # Parsing launch parameters
     # ==============================================================================================
     opt = Opt.from_args()
-    deps = get_all_deps(opt)
+
+    root_path: Path = Path(opt.root_path).resolve()
+    try:
+        session = BuildSession([root_path], opt.deps, jobs=opt.jobs, profile=opt.profile,
+                               keep_going=opt.keep_going, resume=opt.resume,
+                               state_path=root_path / 'build' / 'journal.json')
+    except ValueError as e:
+        print(f'{colorama.Fore.RED}[ERROR]: {colorama.Fore.RESET}{e}', file=sys.stderr)
+        return 1
 
     # ==============================================================================================
-    # Create all the builders
+    # Run all the builders
     # ==============================================================================================
-    root_path: Path = Path(opt.root_path).resolve()
-    for dep in deps.keys():
-        try:
-            add_builder(dep, opt, deps, root_path)
-            print(
-                f'{colorama.Fore.GREEN}[INFO]: {colorama.Fore.RESET}build succesful for \'{dep}\'')
-        except RuntimeError as re:
-            print(
-                f'{colorama.Fore.RED}RuntimeError caught: {colorama.Style.BRIGHT}{colorama.Fore.BLUE}{re}{colorama.Style.RESET_ALL}\n', file=sys.stderr)
-            return 1
+    if opt.action == 'build':
+        results, report = session.build(), report_build
+    elif opt.action == 'clean':
+        results, report = session.clean(), report_clean
+    else:
+        print(f'{colorama.Fore.RED}[ERROR]: {colorama.Fore.RESET}unknown action \'{opt.action}\'',
+              file=sys.stderr)
+        return 1
+
+    # ==============================================================================================
+    # Report results, failed builds can be picked up again with `--resume`
+    # ==============================================================================================
+    succeeded = True
+    for dep in opt.deps:
+        if dep in results[root_path]:
+            succeeded = report(dep, results[root_path][dep]) and succeeded
+
+    return 0 if succeeded else 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,116 @@
+from pathlib import Path
+import json
+import os
+import threading
+
+
+class Journal(object):
+    # ==============================================================================================
+    # Phase-level checkpoints for every build, persisted after each change
+    # so an interrupted or failed build can be resumed where it stopped
+    # A journal can be shared by builders running on several threads
+    #
+    # Layout of the journal file, keyed by `Builder.key`:
+    #   { "<key>": { "fingerprint": str, "phases": [str], "failed": str | null } }
+    # ==============================================================================================
+
+    def __init__(self, path: Path = None):
+        self.path: Path = path
+        self.entries: dict = {}
+        self.lock = threading.RLock()
+
+        if self.path is not None and self.path.exists():
+            try:
+                entries = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                entries = None
+
+            # A corrupt journal only costs us the checkpoints
+            if Journal.is_valid(entries):
+                self.entries = entries
+
+    @staticmethod
+    def is_valid(entries) -> bool:
+        # ==============================================================================================
+        # Checks that loaded entries have the layout described above
+        # ==============================================================================================
+        if not isinstance(entries, dict):
+            return False
+
+        for entry in entries.values():
+            if not isinstance(entry, dict):
+                return False
+            if not isinstance(entry.get('phases'), list):
+                return False
+            if not all(isinstance(phase, str) for phase in entry['phases']):
+                return False
+            if not isinstance(entry.get('failed'), (str, type(None))):
+                return False
+            if not isinstance(entry.get('fingerprint'), (str, type(None))):
+                return False
+
+        return True
+
+    def save(self):
+        if self.path is None:
+            return
+
+        # Write to a temporary file first, so a crash never leaves a half-written journal
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path: Path = self.path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(self.entries, indent=4))
+            os.replace(tmp_path, self.path)
+
+    def begin(self, key: str, fingerprint: str, resume: bool):
+        # ==============================================================================================
+        # Starts a new run for `key`
+        # Completed phases are only kept when resuming with an unchanged fingerprint
+        # ==============================================================================================
+        with self.lock:
+            entry = self.entries.get(key)
+            if (not resume) or (entry is None) or (entry['fingerprint'] != fingerprint):
+                entry = {'fingerprint': fingerprint, 'phases': []}
+
+            entry['failed'] = None
+            self.entries[key] = entry
+            self.save()
+
+    def reset(self, key: str):
+        with self.lock:
+            if self.entries.pop(key, None) is not None:
+                self.save()
+
+    def is_done(self, key: str, phase: str) -> bool:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False
+
+            return phase in entry['phases']
+
+    def _entry(self, key: str) -> dict:
+        return self.entries.setdefault(key, {'fingerprint': None, 'phases': [], 'failed': None})
+
+    def complete(self, key: str, phase: str):
+        with self.lock:
+            entry = self._entry(key)
+            if phase not in entry['phases']:
+                entry['phases'].append(phase)
+                self.save()
+
+    def fail(self, key: str, phase: str):
+        # Nested phases fail from the inside out, keep the innermost one
+        with self.lock:
+            entry = self._entry(key)
+            if entry['failed'] is None:
+                entry['failed'] = phase
+                self.save()
+
+    def failed_phase(self, key: str) -> str:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            return entry['failed']
@@ -0,0 +1,94 @@
+from dataclasses import dataclass, field
+import sys
+
+
+@dataclass
+class Profile(object):
+    name: str
+
+    cmake_options: dict[str, str] = field(default_factory=dict)
+    c_flags: list[str] = field(default_factory=list)
+    cxx_flags: list[str] = field(default_factory=list)
+
+    def configure_args(self) -> list[str]:
+        # ==============================================================================================
+        # Translates the profile into CMake cache options
+        # Flags go into the `*_FLAGS_INIT` variables, so the toolchain defaults are kept
+        # ==============================================================================================
+        args = [f'-D{key}={value}' for key, value in self.cmake_options.items()]
+        if self.c_flags:
+            args.append(f'-DCMAKE_C_FLAGS_INIT={" ".join(self.c_flags)}')
+        if self.cxx_flags:
+            args.append(f'-DCMAKE_CXX_FLAGS_INIT={" ".join(self.cxx_flags)}')
+
+        return args
+
+
+# ==================================================================================================
+# Options that turn off everything we never ship (examples, tests, docs)
+# ==================================================================================================
+_TRIM_OPTIONS: dict[str, dict[str, str]] = {
+    'fmt': {
+        'FMT_DOC': 'OFF',
+        'FMT_TEST': 'OFF',
+    },
+    'glfw3': {
+        'GLFW_BUILD_EXAMPLES': 'OFF',
+        'GLFW_BUILD_TESTS': 'OFF',
+        'GLFW_BUILD_DOCS': 'OFF',
+    },
+    'sfml': {
+        'SFML_BUILD_EXAMPLES': 'OFF',
+        'SFML_BUILD_DOC': 'OFF',
+        'SFML_BUILD_TEST_SUITE': 'OFF',
+    },
+}
+
+# FIXME: MSVC and GCC/Clang spell architecture tuning differently
+_ARCH_FLAGS: list[str] = ['/arch:AVX2'] if sys.platform == 'win32' else ['-march=native']
+
+# ==================================================================================================
+# Available profiles, selectable with `--profile`
+#   default - plain configure, same as running cmake by hand
+#   fast    - unity builds, examples/tests/docs disabled
+#   release - `fast` plus IPO/LTO and architecture tuning
+# ==================================================================================================
+PROFILES: dict[str, dict] = {
+    'default': {
+        'cmake_options': {},
+        'flags': [],
+        'trim': False,
+    },
+    'fast': {
+        'cmake_options': {
+            'CMAKE_UNITY_BUILD': 'ON',
+        },
+        'flags': [],
+        'trim': True,
+    },
+    'release': {
+        'cmake_options': {
+            'CMAKE_UNITY_BUILD': 'ON',
+            'CMAKE_INTERPROCEDURAL_OPTIMIZATION': 'ON',
+        },
+        'flags': _ARCH_FLAGS,
+        'trim': True,
+    },
+}
+
+
+def get_profile(profile: str, name: str) -> Profile:
+    # ==============================================================================================
+    # Resolves the named profile for a single dependency
+    # ==============================================================================================
+    if profile not in PROFILES:
+        raise ValueError(
+            f'unknown profile \'{profile}\', expected one of: {", ".join(PROFILES.keys())}')
+
+    spec = PROFILES[profile]
+
+    cmake_options = dict(spec['cmake_options'])
+    if spec['trim']:
+        cmake_options.update(_TRIM_OPTIONS.get(name, {}))
+
+    return Profile(profile, cmake_options, list(spec['flags']), list(spec['flags']))
@@ -0,0 +1,20 @@
+from pathlib import Path
+
+import pytest
+
+
+def make_project(root: Path, headers: dict[str, str]) -> Path:
+    # ==============================================================================================
+    # Creates a project root with a header-only `spdlog` in its vendor directory
+    # ==============================================================================================
+    include_dir = root / 'vendor' / 'spdlog' / 'include' / 'spdlog'
+    include_dir.mkdir(parents=True)
+    for name, content in headers.items():
+        (include_dir / name).write_text(content)
+
+    return root
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    return make_project(tmp_path / 'project', {'spdlog.h': 'v1'})
@@ -0,0 +1,93 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from builders.common import Builder, Error
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    src = tmp_path / 'src'
+    (src / 'a' / 'b').mkdir(parents=True)
+    (src / 'top.h').write_text('top')
+    (src / 'a' / 'b' / 'deep.h').write_text('deep')
+    (src / 'skip').mkdir()
+    (src / 'skip' / 'skipped.h').write_text('skipped')
+
+    return src
+
+
+def test_copytrees_copies_several_trees(tree: Path, tmp_path: Path):
+    other = tmp_path / 'other'
+    other.mkdir()
+    (other / 'other.h').write_text('other')
+
+    result = Builder.copytrees([(tree, tmp_path / 'dst'), (other, tmp_path / 'dst2')],
+                               ignore=shutil.ignore_patterns('skip'))
+
+    assert result.error == Error.SUCCESS
+    assert (tmp_path / 'dst' / 'a' / 'b' / 'deep.h').read_text() == 'deep'
+    assert (tmp_path / 'dst' / 'top.h').read_text() == 'top'
+    assert not (tmp_path / 'dst' / 'skip').exists()
+    assert (tmp_path / 'dst2' / 'other.h').read_text() == 'other'
+
+
+def test_copytree_overwrites_existing_files(tree: Path, tmp_path: Path):
+    (tmp_path / 'dst').mkdir()
+    (tmp_path / 'dst' / 'top.h').write_text('old')
+
+    assert Builder.copytree(tree, tmp_path / 'dst').error == Error.SUCCESS
+    assert (tmp_path / 'dst' / 'top.h').read_text() == 'top'
+
+
+def test_copytree_reports_missing_source(tmp_path: Path):
+    result = Builder.copytree(tmp_path / 'missing', tmp_path / 'dst')
+    assert result.error == Error.FILE_MISSING
+
+
+def test_copytree_reports_failed_copies(tree: Path, tmp_path: Path):
+    # A file where a directory has to be created
+    (tmp_path / 'dst' / 'a').mkdir(parents=True)
+    (tmp_path / 'dst' / 'a' / 'b').write_text('in the way')
+
+    result = Builder.copytree(tree, tmp_path / 'dst')
+    assert result.error == Error.FILE_COPY_FAILED
+
+
+def test_copytree_reports_unlistable_directories(tree: Path, tmp_path: Path, monkeypatch):
+    scandir = os.scandir
+
+    def failing_scandir(path):
+        if os.fspath(path).endswith(os.path.join('a', 'b')):
+            raise PermissionError(13, 'Permission denied', os.fspath(path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', failing_scandir)
+
+    result = Builder.copytree(tree, tmp_path / 'dst')
+    assert result.error == Error.FILE_COPY_FAILED
+    assert 'Permission denied' in result.result
+
+
+def test_copytree_follows_symlinked_directories(tmp_path: Path):
+    real = tmp_path / 'real' / 'inc'
+    real.mkdir(parents=True)
+    (real / 'linked.h').write_text('linked')
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'linked').symlink_to(real)
+    (src / 'linked_again').symlink_to(real)
+
+    assert Builder.copytree(src, tmp_path / 'dst').error == Error.SUCCESS
+    assert (tmp_path / 'dst' / 'linked' / 'linked.h').read_text() == 'linked'
+    assert (tmp_path / 'dst' / 'linked_again' / 'linked.h').read_text() == 'linked'
+
+
+def test_copytree_reports_symlink_loops(tree: Path, tmp_path: Path):
+    (tree / 'a' / 'loop').symlink_to(tree)
+
+    result = Builder.copytree(tree, tmp_path / 'dst')
+    assert result.error == Error.FILE_COPY_FAILED
+    assert 'symlink loop' in result.result
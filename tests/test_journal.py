@@ -0,0 +1,103 @@
+import json
+from pathlib import Path
+
+from builders import BuildSession
+from builders.common import Error
+from utils.journal import Journal
+
+
+def journal_path(root: Path) -> Path:
+    return root / 'build' / 'journal.json'
+
+
+def test_journal_checkpoints_survive_reload(tmp_path: Path):
+    journal = Journal(tmp_path / 'journal.json')
+    journal.begin('fmt', 'digest', resume=False)
+    journal.complete('fmt', 'prepare')
+    journal.fail('fmt', 'configure')
+    journal.fail('fmt', 'build')
+
+    reloaded = Journal(tmp_path / 'journal.json')
+    assert reloaded.is_done('fmt', 'prepare')
+    assert reloaded.failed_phase('fmt') == 'configure'
+
+
+def test_journal_begin_keeps_phases_only_when_resuming(tmp_path: Path):
+    journal = Journal()
+    journal.begin('fmt', 'digest', resume=False)
+    journal.complete('fmt', 'prepare')
+
+    journal.begin('fmt', 'digest', resume=True)
+    assert journal.is_done('fmt', 'prepare')
+
+    journal.begin('fmt', 'other', resume=True)
+    assert not journal.is_done('fmt', 'prepare')
+
+    journal.complete('fmt', 'prepare')
+    journal.begin('fmt', 'other', resume=False)
+    assert not journal.is_done('fmt', 'prepare')
+
+
+def test_journal_ignores_malformed_files(tmp_path: Path):
+    path = tmp_path / 'journal.json'
+    for content in ['{', '[]', '{"fmt": []}', '{"fmt": {"fingerprint": "x", "failed": null}}',
+                    '{"fmt": {"fingerprint": "x", "phases": [1], "failed": null}}']:
+        path.write_text(content)
+
+        journal = Journal(path)
+        assert journal.entries == {}
+        journal.begin('fmt', 'digest', resume=True)
+        journal.complete('fmt', 'prepare')
+
+
+def test_resume_skips_completed_phases(project: Path):
+    BuildSession([project], ['spdlog'], state_path=journal_path(project)).build()
+    header = project / 'deps' / 'spdlog' / 'include' / 'spdlog' / 'spdlog.h'
+    header.unlink()
+
+    session = BuildSession([project], ['spdlog'], resume=True, state_path=journal_path(project))
+    result = session.build()[project]['spdlog']
+    assert result.error == Error.SUCCESS
+    assert not header.exists()
+
+    BuildSession([project], ['spdlog'], state_path=journal_path(project)).build()
+    assert header.exists()
+
+
+def test_failed_build_resumes_at_failed_phase(project: Path):
+    # The include directory is missing, so `copy_include` fails
+    (project / 'vendor' / 'spdlog' / 'include' / 'spdlog' / 'spdlog.h').unlink()
+    (project / 'vendor' / 'spdlog' / 'include' / 'spdlog').rmdir()
+    (project / 'vendor' / 'spdlog' / 'include').rmdir()
+
+    result = BuildSession([project], ['spdlog'], state_path=journal_path(project)).build()
+    report = result[project]['spdlog'].result
+    assert result[project]['spdlog'].error == Error.FILE_MISSING
+    assert report.failed_phase == 'copy_include'
+
+    entry = json.loads(journal_path(project).read_text())[str(project / 'build' / 'spdlog')]
+    assert entry['failed'] == 'copy_include'
+    assert entry['phases'] == []
+
+
+def test_fresh_run_resets_checkpoints_of_builds_that_did_not_run(project: Path):
+    state = journal_path(project)
+    BuildSession([project], ['spdlog'], state_path=state).build()
+
+    # The header changes, then a fresh run stops at fmt (it has no sources) before spdlog
+    (project / 'vendor' / 'spdlog' / 'include' / 'spdlog' / 'spdlog.h').write_text('v2')
+    results = BuildSession([project], ['fmt', 'spdlog'], state_path=state).build()[project]
+    assert results['fmt'].error == Error.FILE_MISSING
+    assert results['spdlog'].error == Error.NOT_RUN
+
+    # Resuming must rebuild spdlog instead of trusting the older run
+    session = BuildSession([project], ['spdlog'], resume=True, keep_going=True, state_path=state)
+    result = session.build()[project]['spdlog']
+    assert result.error == Error.SUCCESS
+    assert (project / 'deps' / 'spdlog' / 'include' / 'spdlog' / 'spdlog.h').read_text() == 'v2'
+
+
+def test_keep_going_builds_the_remaining_dependencies(project: Path):
+    results = BuildSession([project], ['fmt', 'spdlog'], keep_going=True).build()[project]
+    assert results['fmt'].error == Error.FILE_MISSING
+    assert results['spdlog'].error == Error.SUCCESS
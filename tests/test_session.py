@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pytest
+
+from builders import BuildSession
+from builders.common import Error
+from builders.spdlog import SPDLOGBuilder
+from conftest import make_project
+
+
+@pytest.fixture
+def shared_roots(tmp_path: Path) -> list[Path]:
+    # Two roots whose vendor directory is the same one, through a symlink
+    first = make_project(tmp_path / 'a', {'spdlog.h': 'v1'})
+    second = tmp_path / 'b'
+    second.mkdir()
+    (second / 'vendor').symlink_to(first / 'vendor')
+
+    return [first, second]
+
+
+def test_unknown_dependency_is_rejected(project: Path):
+    with pytest.raises(ValueError):
+        BuildSession([project], ['spdlogg'])
+
+
+def test_identical_builds_are_shared_between_roots(shared_roots: list[Path], monkeypatch):
+    calls = []
+    prepare = SPDLOGBuilder.prepare
+    monkeypatch.setattr(SPDLOGBuilder, 'prepare',
+                        lambda self: calls.append(self.root_path) or prepare(self))
+
+    first, second = shared_roots
+    results = BuildSession(shared_roots, ['spdlog'], jobs=2).build()
+
+    assert calls == [first]
+    assert results[first]['spdlog'].result.shared_from is None
+    assert results[second]['spdlog'].error == Error.SUCCESS
+    assert results[second]['spdlog'].result.shared_from == first
+    assert (second / 'deps' / 'spdlog' / 'include' / 'spdlog' / 'spdlog.h').read_text() == 'v1'
+
+
+def test_failed_shared_build_is_reported_for_every_root(shared_roots: list[Path]):
+    first, second = shared_roots
+    results = BuildSession(shared_roots, ['fmt', 'spdlog'], keep_going=True).build()
+
+    for root in shared_roots:
+        assert results[root]['fmt'].error == Error.FILE_MISSING
+        assert results[root]['fmt'].result.failed_phase == 'copy_include'
+        assert results[root]['spdlog'].error == Error.SUCCESS
+
+    assert results[second]['fmt'].result.shared_from == first
+    assert results[second]['fmt'].result.message == results[first]['fmt'].result.message
+    assert '\x1b' not in results[first]['fmt'].result.message
+
+
+def test_first_failure_stops_builds_that_have_not_started(shared_roots: list[Path], monkeypatch):
+    calls = []
+    monkeypatch.setattr(SPDLOGBuilder, 'prepare', lambda self: calls.append(self))
+
+    results = BuildSession(shared_roots, ['fmt', 'spdlog'], jobs=1).build()
+
+    assert calls == []
+    for root in shared_roots:
+        assert results[root]['fmt'].error == Error.FILE_MISSING
+        assert results[root]['spdlog'].error == Error.NOT_RUN
+
+
+def test_resumed_build_reports_skipped_phases(project: Path):
+    state = project / 'build' / 'journal.json'
+    BuildSession([project], ['spdlog'], state_path=state).build()
+
+    # The journal is the cache, a resumed build of the same session skips everything
+    session = BuildSession([project], ['spdlog'], resume=True, state_path=state)
+    for _ in range(2):
+        result = session.build()[project]['spdlog']
+        assert result.error == Error.SUCCESS
+        assert result.result.skipped_phases == ['prepare', 'build']
+
+
+def test_unexpected_exception_is_reported_with_its_phase(project: Path, monkeypatch):
+    def copy_include(self):
+        raise KeyError('boom')
+
+    monkeypatch.setattr(SPDLOGBuilder, 'copy_include', copy_include)
+
+    results = BuildSession([project], ['spdlog']).build()
+
+    report = results[project]['spdlog'].result
+    assert results[project]['spdlog'].error == Error.INTERNAL_ERROR
+    assert report.failed_phase == 'copy_include'
+    assert 'KeyError' in report.message